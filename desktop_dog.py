@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
-import sys, json
+from __future__ import annotations  # keep `X | None` hints lazy for Python 3.9
+import sys, os, json, math, time
+from collections import OrderedDict
 from pathlib import Path
 from datetime import date
-from PySide6.QtCore import Qt, QTimer, QPoint
-from PySide6.QtGui import QPixmap, QCursor, QAction, QImage, QBitmap, QIcon
+try:
+    import orjson  # optional: native JSON encode/decode
+except ImportError:
+    orjson = None
+from PySide6.QtCore import Qt, QTimer, QPoint, QSize
+from PySide6.QtGui import QPixmap, QCursor, QAction, QImage, QImageReader, QBitmap, QIcon
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QVBoxLayout, QHBoxLayout, QMainWindow,
     QListWidget, QListWidgetItem, QLineEdit, QPushButton, QSpinBox, QFrame,
@@ -14,6 +20,7 @@ from PySide6.QtWidgets import (
 APP_DIR = Path.home() / ".desktop_dog"
 APP_DIR.mkdir(parents=True, exist_ok=True)
 DATA_FILE = APP_DIR / "data_v2.json"
+COMPACT_JSON = False  # True: no indentation, smaller writes
 
 MODES = ["Coding", "PTE", "Job Apps", "Work out"]
 MODE_ICONS = {
@@ -33,24 +40,70 @@ MODE_ANIM_MS = {
 DEFAULT_ANIM_MS = 400
 
 SIZES = {"Small": 220, "Medium": 300, "Large": 380}
+MAX_HEIGHT = max(SIZES.values())  # frames are decoded no larger than this
 DEFAULT_SIZE_KEY = "Small"
+FRAME_CACHE_SIZE = len(MODES) * len(SIZES)  # scaled frame sets kept, least recently used dropped
 SMOOTH = Qt.SmoothTransformation
+FAST = Qt.FastTransformation  # first pass on a cache miss; SMOOTH follows once things settle
+# WA_TranslucentBackground already composites the PNG alpha; only enable the
+# 1-bit window shape mask on platforms without a compositor.
+USE_SHAPE_MASK = False
 
 # -------------------- data I/O --------------------
+def new_log_node():
+    # Per-mode history as parallel lists: secs[i] seconds focused on days[i]
+    return {"days": [], "secs": [], "lifetime": 0}
+
+def _upgrade_focus_log(data):
+    # Older files store {"by_day": {iso_date: seconds}} per mode
+    for node in data.get("focus_log", {}).values():
+        if "by_day" in node:
+            by_day = node.pop("by_day")
+            node["days"] = list(by_day.keys()); node["secs"] = list(by_day.values())
+            node.setdefault("lifetime", 0)
+    return data
+
 def load_data():
-    if DATA_FILE.exists():
-        try:
-            return json.loads(DATA_FILE.read_text(encoding="utf-8"))
-        except Exception:
-            pass
+    try:
+        return _upgrade_focus_log(_loads(DATA_FILE.read_bytes()))
+    except Exception:  # missing on first run, or unreadable: start fresh
+        pass
     return {
         "todos": [],
-        "focus_log": {m: {"by_day": {}, "lifetime": 0} for m in MODES},
+        "focus_log": {m: new_log_node() for m in MODES},
         "ui": {"mode": "Coding", "minutes": 25, "size_key": DEFAULT_SIZE_KEY}
     }
 
+def _dumps(data) -> bytes:
+    if orjson is not None:
+        opts = orjson.OPT_NON_STR_KEYS | (0 if COMPACT_JSON else orjson.OPT_INDENT_2)
+        return orjson.dumps(data, option=opts)
+    if COMPACT_JSON:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+    return text.encode("utf-8")
+
+def _loads(raw: bytes):
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+_last_save_hash = None
+
 def save_data(data):
-    DATA_FILE.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    global _last_save_hash
+    payload = _dumps(data)
+    h = hash(payload)
+    if h == _last_save_hash:
+        return  # nothing changed since the last write
+    # Write to a sibling file, flush it to disk, then swap it in, so neither a
+    # crash nor a power loss leaves a truncated data file behind
+    tmp = DATA_FILE.with_suffix(".json.tmp")
+    with open(tmp, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    tmp.replace(DATA_FILE)
+    _last_save_hash = h
 
 # -------------------- Pet window --------------------
 class DogPet(QWidget):
@@ -67,11 +120,31 @@ class DogPet(QWidget):
         self.toggle_panel = toggle_panel
 
         self._drag_pos: QPoint | None = None
+        # Wheel: sub-notch deltas add up to whole steps, committed once the scrolling pauses
+        self._wheel_accum = 0
+        self._wheel_steps = 0
+        self._wheel_timer = QTimer(self)
+        self._wheel_timer.setSingleShot(True)
+        self._wheel_timer.setInterval(50)
+        self._wheel_timer.timeout.connect(self._commit_wheel)
+        # Single-shot, re-armed for the next frame boundary on each tick
         self._anim_timer = QTimer(self)
-        self._anim_timer.setInterval(DEFAULT_ANIM_MS)
+        self._anim_timer.setSingleShot(True)
+        self._anim_timer.setTimerType(Qt.PreciseTimer)
         self._anim_timer.timeout.connect(self._advance_anim_frame)
-        self._anim_frames: list[QImage] = []
+        self._anim_ms = DEFAULT_ANIM_MS
+        self._anim_start = time.monotonic()
+        self._anim_frames: list[tuple[QPixmap, QBitmap | None]] = []
+        self._anim_order: tuple[int, ...] = ()  # ping-pong indices into _anim_frames
         self._anim_index = 0
+        # Decoded PNGs (at most MAX_HEIGHT tall) per mode, and ready-to-show frames per (mode, size_key)
+        self._raw_cache: dict[str, list[QImage]] = {}
+        self._frame_cache: OrderedDict[tuple[str, str], list[tuple[QPixmap, QBitmap | None]]] = OrderedDict()
+        # Smooth-scales (and caches) the frames shown after a quick FAST pass
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.setInterval(120)
+        self._settle_timer.timeout.connect(self._rerender_smooth)
 
         # Normal window (coverable), frameless, transparent, no focus
         self.setWindowFlags(
@@ -85,7 +158,9 @@ class DogPet(QWidget):
         self.label = QLabel(self); self.label.setAlignment(Qt.AlignCenter)
         lay = QVBoxLayout(self); lay.setContentsMargins(0,0,0,0); lay.addWidget(self.label)
 
-        self.update_appearance()
+        QApplication.instance().applicationStateChanged.connect(self._on_app_state)
+
+        self._show_mode(smooth=True)  # nobody is interacting yet; skip the FAST pass
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self._open_menu)
 
@@ -93,72 +168,154 @@ class DogPet(QWidget):
     def _target_height(self) -> int:
         return SIZES.get(self.get_size_key(), SIZES[DEFAULT_SIZE_KEY])
 
-    def _set_alpha_mask(self, img: QImage):
+    def _alpha_mask(self, img: QImage) -> QBitmap | None:
         try:
-            mask = img.createAlphaMask()
-            self.setMask(QBitmap.fromImage(mask))
+            return QBitmap.fromImage(img.createAlphaMask())
         except Exception:
-            pass
+            return None
 
-    def _apply_frame(self, img: QImage):
-        pix = QPixmap.fromImage(img)
+    def _apply_cached(self, pix: QPixmap, mask: QBitmap | None):
         self.label.setPixmap(pix)
         self.resize(pix.size())
-        self._set_alpha_mask(img)
+        if mask is not None:
+            self.setMask(mask)
+
+    def _read_image(self, path) -> QImage:
+        # Let the reader downscale large sources while decoding, not after
+        r = QImageReader(str(path))
+        if not r.canRead():
+            return QImage()
+        size = r.size()
+        if size.isValid() and size.height() > MAX_HEIGHT:
+            r.setScaledSize(QSize(size.width() * MAX_HEIGHT // size.height(), MAX_HEIGHT))
+        return r.read()
 
     def _load_three_frames(self, stem: Path) -> list[QImage]:
-        paths = [Path(f"{stem}_{i}.png") for i in (0,1,2)]
-        if not all(p.exists() for p in paths):
-            return []
-        th = self._target_height()
         frames = []
-        for p in paths:
-            img = QImage(str(p))
+        for p in (Path(f"{stem}_{i}.png") for i in (0,1,2)):
+            img = self._read_image(p)
             if img.isNull(): return []
-            if img.height() != th:
-                img = img.scaledToHeight(th, SMOOTH)
             frames.append(img)
         return frames
 
+    def _decode_frames(self, mode: str) -> list[QImage]:
+        """Decoded PNGs for mode, shared by every size; read from disk once."""
+        raws = self._raw_cache.get(mode)
+        if raws is None:
+            base = MODE_ICONS.get(mode, "")
+            raws = []
+            if base:
+                # Prefer 3-frame PNG animation, fall back to the single PNG
+                raws = self._load_three_frames(Path(base).with_suffix(''))
+                if not raws:
+                    img = self._read_image(base)
+                    if not img.isNull(): raws = [img]
+            self._raw_cache[mode] = raws
+        return raws
+
+    def _scale_frames(self, raws: list[QImage], th: int, smooth: bool) -> list[tuple[QPixmap, QBitmap | None]]:
+        frames = []
+        for img in raws:
+            if img.height() != th:
+                img = img.scaledToHeight(th, SMOOTH if smooth else FAST)
+            mask = self._alpha_mask(img) if USE_SHAPE_MASK else None
+            frames.append((QPixmap.fromImage(img), mask))
+        return frames
+
+    def _load_frames(self, mode: str, smooth: bool = True) -> list[tuple[QPixmap, QBitmap | None]]:
+        """(pixmap, mask) frames for mode at the current size. Only smooth results are cached."""
+        key = (mode, self.get_size_key())
+        frames = self._frame_cache.get(key)
+        if frames is not None:
+            self._frame_cache.move_to_end(key)
+            return frames
+
+        # A size-only change hits the decode cache and just rescales
+        raws = self._decode_frames(mode)
+        frames = self._scale_frames(raws, self._target_height(), smooth)
+        if not smooth and raws:
+            return frames
+        self._frame_cache[key] = frames
+        if len(self._frame_cache) > FRAME_CACHE_SIZE:
+            self._frame_cache.popitem(last=False)
+        return frames
+
     def _sync_anim_speed(self):
-        self._anim_timer.setInterval(MODE_ANIM_MS.get(self.get_mode(), DEFAULT_ANIM_MS))
+        self._anim_ms = MODE_ANIM_MS.get(self.get_mode(), DEFAULT_ANIM_MS)
+
+    def _anim_elapsed_ms(self) -> float:
+        return (time.monotonic() - self._anim_start) * 1000
+
+    def _next_frame_delay(self) -> int:
+        return max(1, math.ceil(self._anim_ms - self._anim_elapsed_ms() % self._anim_ms))
 
     # ----- appearance -----
     def update_appearance(self):
-        mode = self.get_mode()
+        # Interactive change: quick frames on a cache miss, smooth ones shortly after
+        self._show_mode(smooth=False)
+
+    def _show_mode(self, smooth: bool):
         self._sync_anim_speed()
-        base = MODE_ICONS.get(mode, "")
         self._anim_timer.stop()
-        self._anim_frames.clear()
+        self._settle_timer.stop()
+        self._anim_frames = []
+        self._anim_order = ()
         self._anim_index = 0
+        self._anim_start = time.monotonic()
 
-        # Prefer 3-frame PNG animation if available
-        if base:
-            frames = self._load_three_frames(Path(base).with_suffix(''))
-            if frames:
-                self._anim_frames = frames
-                self._apply_frame(frames[0])
-                self._anim_timer.start()
-                return
-
-        # Fallback single PNG
-        if base and Path(base).exists():
-            img = QImage(base)
-            if not img.isNull():
-                img = img.scaledToHeight(self._target_height(), SMOOTH)
-                self._apply_frame(img)
-                return
-
-        # Emoji fallback: clear mask to avoid invisibility
+        mode = self.get_mode()
+        frames = self._load_frames(mode, smooth)
+        if (mode, self.get_size_key()) not in self._frame_cache:
+            self._settle_timer.start()
+        if frames:
+            n = len(frames)
+            self._anim_frames = frames
+            self._anim_order = tuple(range(n)) + tuple(range(n-2, 0, -1))  # 0,1,2,1
+            self._apply_cached(*frames[0])
+            self._resume_anim()
+            return
+
+        # Emoji fallback: clear mask (if any) to avoid invisibility
         self.label.setText("🐶")
         self.label.setStyleSheet("font-size: 84px;")
-        self.clearMask()
+        if USE_SHAPE_MASK:
+            self.clearMask()
+
+    def _rerender_smooth(self):
+        # Swap in smooth frames for the same mode/size without restarting the animation
+        frames = self._load_frames(self.get_mode(), smooth=True)
+        if len(frames) != len(self._anim_frames): return
+        self._anim_frames = frames
+        if frames:
+            self._apply_cached(*frames[self._anim_order[self._anim_index]])
+
+    def _resume_anim(self):
+        # Animate only while there is something to see
+        if len(self._anim_order) > 1 and self.isVisible():
+            self._anim_timer.start(self._next_frame_delay())
+
+    def showEvent(self, e):
+        self._resume_anim()
+        return super().showEvent(e)
+
+    def hideEvent(self, e):
+        self._anim_timer.stop()
+        return super().hideEvent(e)
+
+    def _on_app_state(self, state):
+        if state in (Qt.ApplicationSuspended, Qt.ApplicationHidden):
+            self._anim_timer.stop()
+        else:
+            self._resume_anim()
 
     def _advance_anim_frame(self):
-        if not self._anim_frames: return
-        seq = self._anim_frames + self._anim_frames[-2:0:-1]  # ping-pong
-        self._anim_index = (self._anim_index + 1) % len(seq)
-        self._apply_frame(seq[self._anim_index])
+        if not self._anim_order: return
+        # Frame follows elapsed time, so late or coalesced ticks never slow the cycle
+        idx = int(self._anim_elapsed_ms() // self._anim_ms) % len(self._anim_order)
+        if idx != self._anim_index:
+            self._anim_index = idx
+            self._apply_cached(*self._anim_frames[self._anim_order[idx]])
+        self._anim_timer.start(self._next_frame_delay())
 
     # ----- interactions -----
     def enterEvent(self, e):
@@ -183,11 +340,23 @@ class DogPet(QWidget):
         self.toggle_panel()
 
     def wheelEvent(self, e):
-        # Scroll to switch modes quickly
-        delta = e.angleDelta().y()
+        # Scroll to switch modes quickly; one mode per 120-unit notch
+        self._wheel_accum += e.angleDelta().y()
+        steps = int(self._wheel_accum / 120)
+        if steps:
+            self._wheel_accum -= steps * 120
+            self._wheel_steps += steps
+        self._wheel_timer.start()  # every event extends the gesture
+        e.accept()
+
+    def _commit_wheel(self):
+        # Gesture over: drop any sub-notch remainder so the next one starts from zero
+        steps, self._wheel_steps = self._wheel_steps, 0
+        self._wheel_accum = 0
+        if not steps: return
         cur = self.get_mode()
-        idx = MODES.index(cur)
-        idx = (idx + 1) % len(MODES) if delta < 0 else (idx - 1) % len(MODES)
+        idx = (MODES.index(cur) - steps) % len(MODES)  # scrolling down moves forward
+        if MODES[idx] == cur: return
         self.set_mode(MODES[idx])
         self.update_appearance()
 
@@ -227,6 +396,12 @@ class ControlPanel(QMainWindow):
         self.on_timer_end = on_timer_end
         self.sync_pet = sync_pet
 
+        # {mode: {iso_date: index into that mode's days/secs}}
+        self._day_index = {
+            m: {d: i for i, d in enumerate(node["days"])}
+            for m, node in self.data["focus_log"].items()
+        }
+
         self.setWindowTitle("Desktop Dog 控制面板")
         self.setMinimumSize(560, 440)
 
@@ -249,6 +424,7 @@ class ControlPanel(QMainWindow):
 
         # ===== Mode & Timer =====
         self.mode_btns = {}
+        self._mode_btn_state: dict[str, bool] = {}  # last applied bold state
         btn_row = QHBoxLayout()
         for m in MODES:
             b = QPushButton(m); b.setCheckable(True)
@@ -260,7 +436,8 @@ class ControlPanel(QMainWindow):
         self.btn_start = QPushButton("开始专注  Start")
         self.btn_stop  = QPushButton("停止  Stop"); self.btn_stop.setEnabled(False)
         self.lbl_time  = QLabel("00:00"); self.lbl_time.setStyleSheet("font-size: 28px; font-weight: 600;")
-        self.lbl_today = QLabel(); self.lbl_total = QLabel(); self._refresh_stats()
+        self._last_time_text = "00:00"
+        self.lbl_today = QLabel(); self.lbl_total = QLabel(); self._last_stats = ("", ""); self._refresh_stats()
 
         self.btn_start.clicked.connect(self._start_timer)
         self.btn_stop.clicked.connect(self._stop_timer)
@@ -301,16 +478,16 @@ class ControlPanel(QMainWindow):
         self._add_item(t, False); self.todo_input.clear(); self._dump_todos(); self._save()
 
     def _delete_selected(self):
-        for it in self.todo_list.selectedItems():
-            self.todo_list.takeItem(self.todo_list.row(it))
+        # Highest row first, so earlier removals never shift the rows still to go
+        rows = sorted((self.todo_list.row(it) for it in self.todo_list.selectedItems()), reverse=True)
+        for i in rows:
+            self.todo_list.takeItem(i)
         self._dump_todos(); self._save()
 
     def _clear_done(self):
-        i=0
-        while i< self.todo_list.count():
-            it = self.todo_list.item(i)
-            if it.checkState()==Qt.Checked: self.todo_list.takeItem(i)
-            else: i+=1
+        # Back to front: takeItem only shifts the rows after i
+        for i in range(self.todo_list.count()-1, -1, -1):
+            if self.todo_list.item(i).checkState()==Qt.Checked: self.todo_list.takeItem(i)
         self._dump_todos(); self._save()
 
     def _on_item_changed(self, item):
@@ -333,8 +510,12 @@ class ControlPanel(QMainWindow):
     def _refresh_mode_buttons(self):
         cur = self.get_mode()
         for m,b in self.mode_btns.items():
-            b.setChecked(m==cur)
-            b.setStyleSheet("font-weight:700;" if m==cur else "")
+            want = m==cur
+            # clicks toggle the checked state themselves, so compare with the button
+            if b.isChecked() != want: b.setChecked(want)
+            if self._mode_btn_state.get(m) == want: continue  # avoid restyling
+            b.setStyleSheet("font-weight:700;" if want else "")
+            self._mode_btn_state[m] = want
 
     def _start_timer(self):
         if self._focusing: return
@@ -363,25 +544,34 @@ class ControlPanel(QMainWindow):
             self._update_time_label()
 
     def _update_time_label(self):
-        s=max(self.remaining,0); self.lbl_time.setText(f"{s//60:02d}:{s%60:02d}")
+        s=max(self.remaining,0); text=f"{s//60:02d}:{s%60:02d}"
+        if text == self._last_time_text: return  # skip the relayout/repaint
+        self._last_time_text = text; self.lbl_time.setText(text)
 
     def _accumulate(self, seconds):
         mode = self.get_mode()
         d = date.today().isoformat()
-        node = self.data["focus_log"].setdefault(mode, {"by_day":{}, "lifetime":0})
-        node["by_day"][d] = node["by_day"].get(d,0)+int(seconds)
+        node = self.data["focus_log"].setdefault(mode, new_log_node())
+        index = self._day_index.setdefault(mode, {})
+        i = index.get(d)
+        if i is None:
+            i = index[d] = len(node["days"]); node["days"].append(d); node["secs"].append(0)
+        node["secs"][i] += int(seconds)
         node["lifetime"] = node.get("lifetime",0)+int(seconds)
         self._refresh_stats()
 
     def _refresh_stats(self):
         mode = self.get_mode()
-        node = self.data["focus_log"].get(mode, {"by_day":{}, "lifetime":0})
-        today = node["by_day"].get(date.today().isoformat(), 0)
-        self.lbl_today.setText(f"{mode} 今日 Today：{today//60} min")
-        self.lbl_total.setText(f"{mode} 累计 Total：{node['lifetime']//60} min")
+        node = self.data["focus_log"].get(mode) or new_log_node()
+        i = self._day_index.get(mode, {}).get(date.today().isoformat())
+        today = node["secs"][i] if i is not None else 0
+        stats = (f"{mode} 今日 Today：{today//60} min", f"{mode} 累计 Total：{node['lifetime']//60} min")
+        if stats == self._last_stats: return  # labels already show this
+        self._last_stats = stats
+        self.lbl_today.setText(stats[0]); self.lbl_total.setText(stats[1])
 
     def _save(self):
-        save_data(self.data)
+        self.save_cb()
 
 # -------------------- App --------------------
 class App(QApplication):
@@ -394,18 +584,25 @@ class App(QApplication):
         self._mode = self.data["ui"].get("mode", "Coding")
         self._size_key = self.data["ui"].get("size_key", DEFAULT_SIZE_KEY)
 
+        # Coalesce writes: each change restarts the countdown, one save when it settles
+        self._save_timer = QTimer(self); self._save_timer.setSingleShot(True); self._save_timer.setInterval(2000)
+        self._save_timer.timeout.connect(lambda: save_data(self.data))
+        self.aboutToQuit.connect(self._flush_save)
+
         def get_mode(): return self._mode
-        def set_mode(m): self._mode = m; self.data["ui"]["mode"] = m; save_data(self.data)
+        def set_mode(m): self._mode = m; self.data["ui"]["mode"] = m; self._save_timer.start()
         def get_size_key(): return self._size_key
-        def set_size_key(k): self._size_key = k; self.data["ui"]["size_key"] = k; save_data(self.data)
+        def set_size_key(k): self._size_key = k; self.data["ui"]["size_key"] = k; self._save_timer.start()
 
-        self.panel = ControlPanel(
+        # The panel is built on first show; most of the time only the pet is on screen
+        self.panel: ControlPanel | None = None
+        self._panel_factory = lambda: ControlPanel(
             data_ref=self.data,
             on_change_mode=set_mode,
             get_mode=get_mode,
             get_size_key=get_size_key,
             set_size_key=set_size_key,
-            save_cb=lambda: save_data(self.data),
+            save_cb=self._save_timer.start,
             on_timer_end=lambda: None,
             sync_pet=lambda: self.pet.update_appearance()
         )
@@ -425,7 +622,7 @@ class App(QApplication):
         tray_menu.addAction(QAction("Show Panel / 显示面板", self, triggered=self.toggle_panel))
 
         def find_my_dog():
-            self.data["ui"]["size_key"] = "Small"; save_data(self.data)
+            self.data["ui"]["size_key"] = "Small"; self._save_timer.start()
             self.pet.update_appearance()
             scr = self.primaryScreen().geometry()
             self.pet.move(scr.width()-self.pet.width()-40, scr.height()-self.pet.height()-80)
@@ -437,10 +634,15 @@ class App(QApplication):
         # Initial placement
         screen = self.primaryScreen().geometry()
         self.pet.move(screen.width()-self.pet.width()-40, screen.height()-self.pet.height()-80)
-        self.pet.show(); self.panel.hide()
+        self.pet.show()
         QTimer.singleShot(200, self.pet.raise_)  # gentle bring-forward once
 
+    def _flush_save(self):
+        if self._save_timer.isActive():
+            self._save_timer.stop(); save_data(self.data)
+
     def toggle_panel(self):
+        if self.panel is None: self.panel = self._panel_factory()
         if self.panel.isVisible(): self.panel.hide()
         else: self.panel.showNormal(); self.panel.raise_()
 